@@ -1,4 +1,9 @@
+import re
+
 from instructions import INSTRUCTIONS  # importing the instruction set
+from linker import (
+    BRANCHES, RELOC_ADDR, RELOC_BRANCH, RELOC_HI, RELOC_IMM, RELOC_LO, format_object, link,
+)
 
 # REGISTERS
 REGISTER_MAP = {
@@ -10,7 +15,7 @@ REGISTER_MAP = {
 
 
 ## MAIN ASSEMBLER
-def assemble_line(line, labels=None, current_idx=None):
+def assemble_line(line):
     parts = line.strip().split()
     if not parts:
         return None
@@ -27,7 +32,7 @@ def assemble_line(line, labels=None, current_idx=None):
     elif instr_type == "I":
         return assemble_i_type(instr, parts[1:], info)
     elif instr_type == "J":
-        return assemble_j_type(parts[1:], info, labels, current_idx)
+        return assemble_j_type(parts[1:], info)
     else:
         raise ValueError(f"Unsupported instruction type: {instr_type}")
 
@@ -39,13 +44,13 @@ def assemble_r_type(instr, operands, info):
     funct = info["funct"]
 
     if instr in ["CRASH", "FREEZE", "TRACE", "BREAKPT"]:
-        return f"{opcode}000000000000000000000{funct}"
+        return f"{opcode}00000000000000000000{funct}"
 
     if instr in ["PANIC", "FORK"]:
         # Check if FORK has operands before trying to access them
         if instr == "FORK" and not operands:
             # Handle FORK with no operands
-            return f"{opcode}000000000000000000000{funct}"
+            return f"{opcode}00000000000000000000{funct}"
         rs = REGISTER_MAP[operands[0]]
         return f"{opcode}{rs}000000000000000{funct}"
 
@@ -60,6 +65,13 @@ def assemble_r_type(instr, operands, info):
 
 
 ## I TYPE INSTRUCTIONS
+def format_imm16(value):
+    value = int(value)
+    if not -(1 << 15) <= value < (1 << 15):
+        raise ValueError(f"Immediate does not fit in 16 bits: {value}")
+    return format(value & 0xFFFF, '016b')  # support 2's complement
+
+
 def assemble_i_type(instr, operands, info):
     operands = [op.strip(",") for op in operands]
     opcode = info["opcode"]
@@ -67,8 +79,7 @@ def assemble_i_type(instr, operands, info):
     if instr == "404":
         rs = REGISTER_MAP[operands[0]]
         rt = REGISTER_MAP[operands[1]]
-        offset_val = int(operands[2])
-        offset = format(offset_val & 0xFFFF, '016b')  # support 2's complement
+        offset = format_imm16(operands[2])
         return f"{opcode}{rs}{rt}{offset}"
 
     if instr == "GLITCH":
@@ -77,107 +88,184 @@ def assemble_i_type(instr, operands, info):
         imm = "0" * 16
         return f"{opcode}{rs}{rt}{imm}"
 
-    if instr in ["BEQ", "BNE"]:
+    if instr in ["BEQ", "BNE", "BLT"]:
         rs = REGISTER_MAP[operands[0]]
         rt = REGISTER_MAP[operands[1]]
-        offset_val = int(operands[2])
-        offset = format(offset_val & 0xFFFF, '016b')  # support 2's complement
+        offset = format_imm16(operands[2])
         return f"{opcode}{rs}{rt}{offset}"
 
     if instr == "ADDI":
         rs = REGISTER_MAP[operands[1]]
         rt = REGISTER_MAP[operands[0]]
-        imm = format(int(operands[2]), '016b')
+        imm = format_imm16(operands[2])
         return f"{opcode}{rs}{rt}{imm}"
 
     if instr in ["LW", "SW"]:
         rt = REGISTER_MAP[operands[0]]
         offset, base = operands[1].split('(')
-        offset = format(int(offset), '016b')
+        offset = format_imm16(offset)
         rs = REGISTER_MAP[base.strip(')')]
         return f"{opcode}{rs}{rt}{offset}"
 
 
 ## J TYPE INSTRUCTIONS
-def assemble_j_type(operands, info, labels=None, current_idx=None):
+def assemble_j_type(operands, info):
     opcode = info["opcode"]
     target = operands[0].strip(",")
 
-    if labels and target in labels:
-        addr = labels[target]
-    else:
-        try:
-            addr = int(target)
-        except ValueError:
-            raise ValueError(f"Invalid jump target: {target}")
+    try:
+        addr = int(target)
+    except ValueError:
+        raise ValueError(f"Invalid jump target: {target}")
 
+    if not 0 <= addr < (1 << 26):
+        raise ValueError(f"Jump target does not fit in 26 bits: {addr}")
     return f"{opcode}{format(addr, '026b')}"
 
 
+## DATA DIRECTIVES
+def parse_word_directive(line):
+    values = line.split("#")[0].strip()[len(".word"):].replace(",", " ").split()
+    try:
+        return [int(v, 0) for v in values]
+    except ValueError:
+        raise ValueError(f"Invalid .word value in: {line.strip()}")
+
+
 ## LABELS
+# symbols maps each label to (section, address); exports holds the labels
+# named by a .globl directive
 def resolve_labels(lines):
-    labels = {}
+    symbols = {}
     instruction_lines = []
+    data = []        # data segment words, addressed from 0
+    exports = set()
     pc = 0  # instruction counter
+    in_data = False
 
     for line in lines:
         clean = line.strip()
         if not clean or clean.startswith("#"):
             continue
-        if clean.endswith(":"):
+        if clean == ".data":
+            in_data = True
+        elif clean == ".text":
+            in_data = False
+        elif clean.startswith(".globl"):
+            exports.update(clean[len(".globl"):].replace(",", " ").split())
+        elif clean.endswith(":"):
             label = clean[:-1]
-            labels[label] = pc
+            symbols[label] = ("data", len(data)) if in_data else ("text", pc)
+        elif in_data:
+            if not clean.startswith(".word"):
+                raise ValueError(f"Unknown data directive: {clean}")
+            data.extend(parse_word_directive(clean))
         else:
             instruction_lines.append(clean)
             pc += 1
 
-    return labels, instruction_lines
+    for name in exports:
+        if name not in symbols:
+            raise ValueError(f"Exported label is not defined: {name}")
 
+    return symbols, instruction_lines, data, exports
 
-## ASSEMBLER
-def assemble_program(lines):
-    output = []
-    labels, instructions = resolve_labels(lines)
+
+# %hi(label) / %lo(label) ADDI operands, see ADDRESS_PAGE
+HALF_ADDRESS_RE = re.compile(r"%(hi|lo)\(([^()\s]+)\)")
+
+
+def is_label(operand):
+    try:
+        int(operand)
+    except ValueError:
+        return True
+    return False
+
+
+## OBJECT FILES
+# Assembles one module without deciding where it will be placed. Branches to
+# labels in the same module are position independent and resolved here;
+# every other label operand is left as 0 and recorded as a relocation for
+# the linker to patch.
+def assemble_object(lines):
+    text = []
+    relocs = []  # (instruction index, kind, symbol)
+    symbols, instructions, data, exports = resolve_labels(lines)
 
     for idx, line in enumerate(instructions):
         try:
             parts = line.split()
             instr_name = parts[0].upper()
-
-            # Replace label operands for I-type branches
-            if instr_name in ["BEQ", "BNE", "BLT", "404"] and len(parts) > 1 and parts[-1] in labels:
-                label = parts[-1]
-                offset = labels[label] - (idx + 1)
-                parts[-1] = str(offset)
+            target = parts[-1].strip(",") if len(parts) > 1 else None
+
+            if target is not None and is_label(target):
+                if instr_name in BRANCHES:
+                    section, addr = symbols.get(target, (None, None))
+                    if section == "text":
+                        parts[-1] = str(addr - (idx + 1))
+                    else:
+                        relocs.append((idx, RELOC_BRANCH, target))
+                        parts[-1] = "0"
+                elif instr_name == "ADDI":
+                    m = HALF_ADDRESS_RE.fullmatch(target)
+                    if m:
+                        kind = RELOC_HI if m.group(1) == "hi" else RELOC_LO
+                        relocs.append((idx, kind, m.group(2)))
+                    else:
+                        relocs.append((idx, RELOC_IMM, target))
+                    parts[-1] = "0"
+                elif INSTRUCTIONS.get(instr_name, {}).get("type") == "J":
+                    relocs.append((idx, RELOC_ADDR, target))
+                    parts[-1] = "0"
                 line = " ".join(parts)
 
-            binary = assemble_line(line, labels=labels, current_idx=idx)
+            binary = assemble_line(line)
             if binary:
-                output.append(binary)
+                text.append(binary)
 
         except Exception as e:
             print(f"Error on line: {line.strip()}")
             raise e
 
-    return output
+    return {
+        "text": text,
+        "data": data,
+        "symbols": symbols,
+        "exports": exports,
+        "relocs": relocs,
+    }
+
+
+## ASSEMBLER
+def assemble_program(lines):
+    return link([assemble_object(lines)])
 
 
 ### USAGE
 if __name__ == "__main__":
     import sys
 
-    if len(sys.argv) != 3:
-        print("Usage: python assembler.py input.asm output.bin")
+    args = sys.argv[1:]
+    make_object = bool(args) and args[0] == "-c"
+    if make_object:
+        args = args[1:]
+
+    if len(args) != 2:
+        print("Usage: python assembler.py [-c] input.asm output.bin")
+        print("       -c writes a relocatable object file for linker.py instead")
         sys.exit(1)
 
-    input_file = sys.argv[1]
-    output_file = sys.argv[2]
+    input_file, output_file = args
 
     with open(input_file, "r") as f:
         lines = f.readlines()
 
     try:
-        binary_output = assemble_program(lines)
+        if make_object:
+            binary_output = format_object(assemble_object(lines))
+        else:
+            binary_output = assemble_program(lines)
     except ValueError as e:
         print(f"Assembly failed: {e}")
         sys.exit(1)
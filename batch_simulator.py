@@ -0,0 +1,209 @@
+import sys
+
+import numpy as np
+
+from simulator import (
+    DEFAULT_MEMORY_WORDS, EXIT_CRASH, EXIT_OK, EXIT_PANIC, EXIT_TIMEOUT,
+    GOLDEN_GAMMA, NUM_REGISTERS, load_program, to_signed32,
+)
+
+# Runs many copies ("lanes") of one program at once, SIMT style. Every step
+# picks the lowest PC among the running lanes and executes that instruction
+# for all lanes sitting at it, so lanes that agree on control flow move
+# together and divergent lanes wait until the group reaches them.
+
+RUNNING = -1
+
+
+# Vectorized simulator.glitch_roll
+def glitch_roll(seeds, cycles):
+    z = seeds + cycles.astype(np.uint64) * np.uint64(GOLDEN_GAMMA)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return ((z ^ (z >> np.uint64(31))) >> np.uint64(63)) == 1
+
+
+## EXECUTION
+# seeds: one GLITCH seed per lane; lane i behaves like
+#        simulator.run(..., seed=seeds[i])
+# init_regs: optional (lanes, 15) starting register files
+# returns (statuses, outputs, cycles) with one entry per lane
+def run_lanes(program, data, seeds, init_regs=None, max_steps=1_000_000,
+              memory_words=DEFAULT_MEMORY_WORDS):
+    seeds = np.asarray(seeds, dtype=np.int64).astype(np.uint64)
+    lanes = len(seeds)
+
+    regs = np.zeros((lanes, NUM_REGISTERS), dtype=np.int64)
+    if init_regs is not None:
+        regs[:] = init_regs
+        regs[:, 0] = 0
+
+    # Lanes share one memory image. Each lane only gets a private copy of the
+    # window of addresses stores have touched, grown on demand, so a large
+    # data segment is not copied into every lane. Storing across the whole
+    # memory still costs lanes * memory words.
+    size = max(memory_words, len(data))
+    shared = np.zeros(size, dtype=np.int64)
+    shared[:len(data)] = data
+    window = np.zeros((lanes, 0), dtype=np.int64)
+    window_base = 0
+
+    pc = np.zeros(lanes, dtype=np.int64)
+    cycles = np.zeros(lanes, dtype=np.int64)
+    status = np.full(lanes, RUNNING, dtype=np.int8)
+    out = np.zeros((lanes, 64), dtype=np.uint8)
+    out_len = np.zeros(lanes, dtype=np.int64)
+    panics = {}  # lane -> message, added to its output like simulator.run does
+    end = len(program)
+
+    def panic(lane_ids, messages):
+        status[lane_ids] = EXIT_PANIC
+        for lane, message in zip(lane_ids.tolist(), messages):
+            panics[lane] = message
+
+    # widen the private window to cover [lo, hi), at least doubling it so a
+    # loop storing to consecutive addresses does not copy it every step
+    def grow_window(lo, hi):
+        nonlocal window, window_base
+        width = window.shape[1]
+        base = min(lo, window_base) if width else lo
+        end = max(hi, window_base + width) if width else hi
+        want = max(end - base, 2 * width)
+        if lo < window_base:
+            base = max(0, end - want)
+        else:
+            end = min(size, base + want)
+        grown = np.tile(shared[base:end], (lanes, 1))
+        grown[:, window_base - base:window_base - base + width] = window
+        window, window_base = grown, base
+
+    while True:
+        active = np.flatnonzero(status == RUNNING)
+        if not len(active):
+            break
+
+        lane_pc = pc[active]
+        done = lane_pc == end
+        bad = (lane_pc < 0) | (lane_pc > end)
+        slow = cycles[active] >= max_steps
+        if done.any() or bad.any() or slow.any():
+            status[active[done]] = EXIT_OK
+            panic(active[bad], [f"jump outside the program to {p}" for p in lane_pc[bad].tolist()])
+            status[active[slow & ~done & ~bad]] = EXIT_TIMEOUT
+            keep = ~(done | bad | slow)
+            active = active[keep]
+            lane_pc = lane_pc[keep]
+            if not len(active):
+                continue
+
+        target = int(lane_pc.min())
+        idx = active[lane_pc == target]
+        name, a, b, c = program[target]
+        cycles[idx] += 1
+        pc[idx] = target + 1
+
+        if name == "ADDI":
+            regs[idx, a] = to_signed32(regs[idx, b] + c)
+        elif name == "ADD":
+            regs[idx, a] = to_signed32(regs[idx, b] + regs[idx, c])
+        elif name == "SUB":
+            regs[idx, a] = to_signed32(regs[idx, b] - regs[idx, c])
+        elif name == "MUL":
+            regs[idx, a] = to_signed32(regs[idx, b] * regs[idx, c])
+        elif name in ("DIV", "MOD"):
+            x = regs[idx, b]
+            y = regs[idx, c]
+            zero = y == 0
+            panic(idx[zero], [f"division by zero at {target}"] * int(zero.sum()))
+            safe_y = np.where(zero, 1, y)
+            # C semantics: the quotient truncates toward zero
+            quotient = np.abs(x) // np.abs(safe_y)
+            quotient = np.where((x < 0) != (safe_y < 0), -quotient, quotient)
+            result = quotient if name == "DIV" else x - quotient * safe_y
+            regs[idx[~zero], a] = to_signed32(result[~zero])
+        elif name in ("BEQ", "BNE", "BLT", "404"):
+            if name == "BEQ":
+                taken = regs[idx, a] == regs[idx, b]
+            elif name == "BNE":
+                taken = regs[idx, a] != regs[idx, b]
+            elif name == "BLT":
+                taken = regs[idx, a] < regs[idx, b]
+            else:
+                taken = regs[idx, b] == -1
+            pc[idx[taken]] += c
+        elif name == "JUMP":
+            pc[idx] = a
+        elif name == "LW" or name == "SW":
+            addr = regs[idx, b] + c
+            ok = (addr >= 0) & (addr < size)
+            panic(idx[~ok], [f"{name} outside memory at address {bad_addr}" for bad_addr in addr[~ok].tolist()])
+            idx, addr = idx[ok], addr[ok]
+            if name == "LW":
+                values = shared[addr]
+                inside = (addr >= window_base) & (addr < window_base + window.shape[1])
+                values[inside] = window[idx[inside], addr[inside] - window_base]
+                regs[idx, a] = values
+            elif len(idx):
+                if addr.min() < window_base or addr.max() >= window_base + window.shape[1]:
+                    grow_window(int(addr.min()), int(addr.max()) + 1)
+                window[idx, addr - window_base] = regs[idx, a]
+        elif name == "PANIC":
+            if out_len[idx].max() >= out.shape[1]:
+                out = np.concatenate([out, np.zeros_like(out)], axis=1)
+            out[idx, out_len[idx]] = regs[idx, a] & 0xFF
+            out_len[idx] += 1
+        elif name == "NULL":
+            regs[idx, a] = 0
+        elif name == "GLITCH":
+            swap = idx[glitch_roll(seeds[idx], cycles[idx])]
+            regs[swap, a], regs[swap, b] = regs[swap, b], regs[swap, a].copy()
+        elif name == "REBOOT":
+            regs[idx] = 0
+            pc[idx] = a
+        elif name == "CRASH":
+            status[idx] = EXIT_CRASH
+        elif name == "FREEZE":
+            status[idx] = EXIT_OK
+        # TRACE, FORK and BREAKPT do nothing in the batch simulator
+
+        regs[idx, 0] = 0  # $r0 always reads as zero
+
+    outputs = [out[i, :out_len[i]].tobytes().decode("latin-1") for i in range(lanes)]
+    for lane, message in panics.items():
+        outputs[lane] += f"\n[panic] {message}\n"
+    return status.astype(np.int64), outputs, cycles
+
+
+### USAGE
+def main(argv=None):
+    import argparse
+    from collections import Counter
+
+    parser = argparse.ArgumentParser(description="Run many seeds of an Error-404 .bin program at once")
+    parser.add_argument("program")
+    parser.add_argument("--lanes", type=int, default=1000)
+    parser.add_argument("--first-seed", type=int, default=0, help="lane i uses seed first_seed + i")
+    parser.add_argument("--max-steps", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    with open(args.program, "r") as f:
+        binary_lines = f.readlines()
+
+    try:
+        program, data = load_program(binary_lines)
+    except ValueError as e:
+        print(f"Loading failed: {e}")
+        return EXIT_PANIC
+
+    seeds = np.arange(args.first_seed, args.first_seed + args.lanes)
+    statuses, outputs, _ = run_lanes(program, data, seeds, max_steps=args.max_steps)
+
+    # one line per distinct outcome, most common first
+    outcomes = Counter(zip(statuses.tolist(), outputs))
+    for (status, output), lanes in outcomes.most_common():
+        print(f"{lanes:>8} lanes  status {status}  output {output!r}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
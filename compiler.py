@@ -1,6 +1,27 @@
+import os
 import re
 import sys
 
+from instructions import ADDRESS_PAGE
+
+# A printf loop costs this many instructions no matter how long the string is,
+# while the inline form costs two (ADDI + PANIC) per character.
+PRINT_LOOP_SIZE = 9
+
+# printf clobbers these, so they are never handed out to variables
+PRINT_SCRATCH = ("$r6", "$r7")
+LAST_REG = 9  # $r1-$r9 are general purpose
+
+# Statement and expression patterns, compiled once per process
+CALL_RE = re.compile(r"([A-Za-z_]\w*)\((.*)\)")
+IDENT_RE = re.compile(r"[A-Za-z_]\w*")
+FUNC_DEF2_RE = re.compile(r"int\s+([A-Za-z_]\w*)\s*\(\s*int\s+([A-Za-z_]\w*)\s*,\s*int\s+([A-Za-z_]\w*)\s*\)")
+FUNC_DEF0_RE = re.compile(r"int\s+([A-Za-z_]\w*)\s*\(\s*\)")
+FOR_RE = re.compile(r"for\s*\(\s*([^;]+)\s*;\s*([^;]+)\s*;\s*([^)]+)\s*\)\s*{?")
+IF_RE = re.compile(r"if\s*\((.+)\)")
+DECL_RE = re.compile(r"int\s+([A-Za-z_]\w*)\s*(=\s*(.+))?$")
+PRINTF_RE = re.compile(r'printf\("(.+)"\)')
+
 class CCompiler:
     def __init__(self):
         self.next_reg = 1
@@ -9,10 +30,15 @@ class CCompiler:
         self.output = []
         self.functions = {}   # name -> (params, body)
         self.current_function = None
+        self.strings = {}     # string literal -> data label
 
     def new_reg(self):
         r = f"$r{self.next_reg}"
         self.next_reg += 1
+        if r in PRINT_SCRATCH:
+            return self.new_reg()
+        if self.next_reg > LAST_REG + 1:
+            raise SyntaxError(f"out of registers: only $r1-$r{LAST_REG} are available")
         return r
 
     def new_label(self, prefix="L"):
@@ -28,12 +54,43 @@ class CCompiler:
     def emit(self, line):
         self.output.append(line)
 
+    def string_label(self, text):
+        if text not in self.strings:
+            self.strings[text] = f"STR{len(self.strings)}"
+        return self.strings[text]
+
+    # lay out every string literal once, letting a string that is the tail of a
+    # longer one point into it instead of getting its own copy
+    def emit_data_section(self):
+        if not self.strings:
+            return
+        # Sorted by reversed text, every string that ends with t sorts just
+        # after t, so walking backwards each string either ends the current
+        # root or starts a new one
+        roots = []   # (text, {offset: [labels]})
+        for text in sorted(self.strings, key=lambda t: t[::-1], reverse=True):
+            label = self.strings[text]
+            if roots and roots[-1][0].endswith(text):
+                root, offsets = roots[-1]
+                offsets.setdefault(len(root) - len(text), []).append(label)
+            else:
+                roots.append((text, {0: [label]}))
+
+        self.emit(".data")
+        for root, offsets in roots:
+            words = [ord(c) for c in root] + [0]  # NUL terminated
+            cuts = sorted(offsets) + [len(words)]
+            for start, stop in zip(cuts, cuts[1:]):
+                for label in offsets[start]:
+                    self.emit(f"{label}:")
+                self.emit(".word " + ", ".join(str(w) for w in words[start:stop]))
+
     # parse very simple expressions: ints, vars, binary ops + - * / %
     def compile_expression(self, expr):
         expr = expr.strip()
         
         # Function call
-        m = re.match(r"([A-Za-z_]\w*)\((.*)\)", expr)
+        m = CALL_RE.match(expr)
         if m:
             func_name, args_str = m.groups()
             args = [arg.strip() for arg in args_str.split(',') if arg.strip()]
@@ -58,13 +115,15 @@ class CCompiler:
             
             return self.new_reg()  # For other functions, just return a placeholder
             
-        # integer literal
+        # integer literal; zero is always in $r0
+        if expr.isdigit() and int(expr) == 0:
+            return "$r0"
         if expr.isdigit():
             r = self.new_reg()
             self.emit(f"ADDI {r}, $r0, {expr}")
             return r
         # variable
-        if re.fullmatch(r"[A-Za-z_]\w*", expr):
+        if IDENT_RE.fullmatch(expr):
             return self.alloc_var(expr)
         # binary operation
         # This only handles one operator at a time (no precedence), but you can extend it
@@ -139,7 +198,7 @@ class CCompiler:
             return
             
         # Function definition with two parameters - int sum(int a, int b)
-        m = re.match(r"int\s+([A-Za-z_]\w*)\s*\(\s*int\s+([A-Za-z_]\w*)\s*,\s*int\s+([A-Za-z_]\w*)\s*\)", line)
+        m = FUNC_DEF2_RE.match(line)
         if m:
             func_name, param1, param2 = m.groups()
             self.current_function = func_name
@@ -147,7 +206,7 @@ class CCompiler:
             return ("FUNCTION_DEF", func_name)
     
         # Function definition with no parameters - int main()
-        m = re.match(r"int\s+([A-Za-z_]\w*)\s*\(\s*\)", line)
+        m = FUNC_DEF0_RE.match(line)
         if m:
             func_name = m.group(1)
             self.current_function = func_name
@@ -177,7 +236,7 @@ class CCompiler:
             return
 
         # for loop: for(init; cond; update)
-        m = re.match(r"for\s*\(\s*([^;]+)\s*;\s*([^;]+)\s*;\s*([^)]+)\s*\)\s*{?", line)
+        m = FOR_RE.match(line)
         if m:
             init, cond, update = m.groups()
             # init
@@ -194,7 +253,7 @@ class CCompiler:
 
         # if / else - must come before assignment check
         if line.startswith("if"):
-            cond = re.match(r"if\s*\((.+)\)", line).group(1)
+            cond = IF_RE.match(line).group(1)
             # Add TRACE before if condition
             self.emit("TRACE")
             lbl_true = self.new_label("IF_T")
@@ -211,7 +270,7 @@ class CCompiler:
             return ("ELSE", None)
 
         # int declaration
-        m = re.match(r"int\s+([A-Za-z_]\w*)\s*(=\s*(.+))?$", line)
+        m = DECL_RE.match(line)
         if m:
             name = m.group(1)
             self.alloc_var(name)
@@ -231,13 +290,33 @@ class CCompiler:
             return
 
         # printf("literal")
-        m = re.match(r'printf\("(.+)"\)', line)
+        m = PRINTF_RE.match(line)
         if m:
-            s = m.group(1)
-            for c in s:
-                a = ord(c)
-                self.emit(f"ADDI $r6, $r0, {a}")
-                self.emit("PANIC $r6")
+            try:
+                s = m.group(1).encode("latin-1", "backslashreplace").decode("unicode_escape")
+            except UnicodeDecodeError as e:
+                raise SyntaxError(f"bad escape in printf literal `{m.group(1)}`: {e.reason}") from None
+            if 2 * len(s) <= PRINT_LOOP_SIZE:
+                for c in s:
+                    a = ord(c)
+                    self.emit(f"ADDI $r6, $r0, {a}")
+                    self.emit("PANIC $r6")
+                return
+            # walk the string in the data segment until its NUL terminator
+            loop = self.new_label("PRINT")
+            done = self.new_label("PRINT_E")
+            label = self.string_label(s)
+            self.emit(f"ADDI $r7, $r0, %hi({label})")
+            self.emit(f"ADDI $r6, $r0, {ADDRESS_PAGE}")
+            self.emit("MUL $r7, $r7, $r6")
+            self.emit(f"ADDI $r7, $r7, %lo({label})")
+            self.emit(f"{loop}:")
+            self.emit("LW $r6, 0($r7)")
+            self.emit(f"BEQ $r6, $r0, {done}")
+            self.emit("PANIC $r6")
+            self.emit("ADDI $r7, $r7, 1")
+            self.emit(f"JUMP {loop}")
+            self.emit(f"{done}:")
             return
 
         if line == "{":
@@ -251,9 +330,27 @@ class CCompiler:
 
     # top-level compile
     def compile(self, src):
-        stmts = [l for l in src.splitlines()]
+        asm = []
+        for block in self.compile_blocks(src.splitlines()):
+            asm.extend(block)
+        return asm
+
+    # compile a stream of source lines, writing each finished block to `sink`
+    # as soon as it closes; returns the number of lines written
+    def compile_stream(self, lines, sink):
+        written = 0
+        for block in self.compile_blocks(lines):
+            sink.write("".join(line + "\n" for line in block))
+            written += len(block)
+        return written
+
+    # yield the emitted lines each time no block is left open, so only the
+    # block being compiled is held in memory. An if without braces is never
+    # closed, so after one nothing is flushed until the end of the source;
+    # string literals are always kept until the data section is written.
+    def compile_blocks(self, lines):
         stack = []
-        for line in stmts:
+        for line in lines:
             res = self.compile_stmt(line)
             if isinstance(res, tuple):
                 kind, data = res
@@ -304,16 +401,34 @@ class CCompiler:
                         # Mark that we've seen an else
                         self.current_if_has_else = True
                 # else ignore
-        return self.output
+            if not stack and self.output:
+                yield self.output
+                self.output = []
+        self.emit_data_section()
+        if self.output:
+            yield self.output
+            self.output = []
+
+
+# compile input_path into output_path, streaming through a temporary file in
+# the same directory that replaces the output only once the whole source has
+# compiled, so a failed compile never leaves a truncated .asm behind
+def compile_file(input_path, output_path):
+    tmp_path = f"{output_path}.{os.getpid()}-{os.urandom(4).hex()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with open(input_path) as src, os.fdopen(fd, "w") as f:
+            written = CCompiler().compile_stream(src, f)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return written
+
 
-if (__name__):
+if __name__ == "__main__":
     if len(sys.argv) != 3:
         print("Usage: python compiler.py input.c output.asm")
         sys.exit(1)
-    with open(sys.argv[1]) as f:
-        src = f.read()
-    comp = CCompiler()
-    asm = comp.compile(src)
-    with open(sys.argv[2], "w") as f:
-        f.write("\n".join(asm))
-    print(f"Wrote {len(asm)} lines to {sys.argv[2]}")
\ No newline at end of file
+    written = compile_file(sys.argv[1], sys.argv[2])
+    print(f"Wrote {written} lines to {sys.argv[2]}")
\ No newline at end of file
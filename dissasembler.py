@@ -1,4 +1,4 @@
-from instructions import INSTRUCTIONS
+from instructions import INSTRUCTIONS, DATA_MARKER
 
 # Reverse register map
 REVERSE_REGISTER_MAP = {
@@ -51,7 +51,7 @@ def decode_i_type(binary, pc):
     if imm[0] == "1":  # handle negative two's complement
         imm_val -= (1 << 16)
 
-    if instr in ["BEQ", "BNE", "404"]:
+    if instr in ["BEQ", "BNE", "BLT", "404"]:
         return f"{instr} {REVERSE_REGISTER_MAP[rs]}, {REVERSE_REGISTER_MAP[rt]}, {imm_val}"
     elif instr == "ADDI":
         return f"{instr} {REVERSE_REGISTER_MAP[rt]}, {REVERSE_REGISTER_MAP[rs]}, {imm_val}"
@@ -70,8 +70,52 @@ def decode_j_type(binary):
     return f"{instr} {addr}"
 
 
+def split_sections(binary_lines):
+    text_lines = []
+    data_lines = []
+    section = text_lines
+
+    for line in binary_lines:
+        line = line.strip()
+        if line == DATA_MARKER:
+            section = data_lines
+        elif line:
+            section.append(line)
+
+    return text_lines, data_lines
+
+
+def render_data_section(data_lines):
+    words = []
+    for line in data_lines:
+        word = int(line, 2)
+        if line[0] == "1":  # handle negative two's complement
+            word -= (1 << 32)
+        words.append(word)
+
+    if not words:
+        return []
+
+    output = [DATA_MARKER]
+    start = 0
+    # one label per NUL terminated string
+    for addr, word in enumerate(words):
+        if word == 0 or addr == len(words) - 1:
+            chunk = words[start:addr + 1]
+            line = "    .word " + ", ".join(str(w) for w in chunk)
+            if all(0 <= w < 256 for w in chunk):
+                text = "".join(chr(w) for w in chunk if w)
+                line += '  # "' + text.encode("unicode_escape").decode("ascii") + '"'
+            output.append(f"D{start}:")
+            output.append(line)
+            start = addr + 1
+
+    return output
+
+
 def disassemble_binary(binary_lines):
     output = []
+    binary_lines, data_lines = split_sections(binary_lines)
 
     for pc, line in enumerate(binary_lines):
         line = line.strip()
@@ -96,29 +140,12 @@ def disassemble_binary(binary_lines):
         indented = "    " + asm if not asm.endswith(":") else asm
         output.append(indented)
 
+    output.extend(render_data_section(data_lines))
     return output
 
 
 def identify_and_inject_labels(binary_lines):
-    from instructions import INSTRUCTIONS
-
-    # Reverse register map
-    REVERSE_REGISTER_MAP = {
-        "00000": "$r0", "00001": "$r1", "00010": "$r2", "00011": "$r3",
-        "00100": "$r4", "00101": "$r5", "00110": "$r6", "00111": "$r7",
-        "01000": "$r8", "01001": "$r9", "01010": "$ip", "01011": "$sp",
-        "01100": "$err", "01101": "$ex", "01110": "$dbg"
-    }
-
-    # Build maps
-    OPCODE_MAP = {}
-    FUNCT_MAP = {}
-    for name, info in INSTRUCTIONS.items():
-        if info["type"] == "R":
-            FUNCT_MAP[(info["opcode"], info["funct"])] = name
-        else:
-            OPCODE_MAP[info["opcode"]] = name
-
+    binary_lines, data_lines = split_sections(binary_lines)
     label_targets = set()
 
     # Pass 1: detect branch and jump targets
@@ -129,7 +156,7 @@ def identify_and_inject_labels(binary_lines):
         opcode = binary[:6]
         instr = OPCODE_MAP.get(opcode)
 
-        if instr in ["BEQ", "BNE", "404"]:
+        if instr in ["BEQ", "BNE", "BLT", "404"]:
             imm = binary[16:32]
             offset = int(imm, 2)
             if imm[0] == '1':
@@ -174,7 +201,7 @@ def identify_and_inject_labels(binary_lines):
                 output.append(f"    {name} {REVERSE_REGISTER_MAP[rd]}, {REVERSE_REGISTER_MAP[rs]}, {REVERSE_REGISTER_MAP[rt]}")
 
         # Decode I-type
-        elif instr in ["BEQ", "BNE", "404"]:
+        elif instr in ["BEQ", "BNE", "BLT", "404"]:
             rs = REVERSE_REGISTER_MAP[binary[6:11]]
             rt = REVERSE_REGISTER_MAP[binary[11:16]]
             imm = binary[16:32]
@@ -215,6 +242,11 @@ def identify_and_inject_labels(binary_lines):
         else:
             output.append(f"    UNKNOWN_OPCODE({opcode})")
 
+    # A branch may target the address just past the last instruction
+    if len(binary_lines) in label_map:
+        output.append(f"{label_map[len(binary_lines)]}:")
+
+    output.extend(render_data_section(data_lines))
     return output
 
 
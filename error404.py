@@ -0,0 +1,240 @@
+import json
+import os
+import socket
+import struct
+import sys
+
+# Toolchain entry point. The compiler, assembler and disassembler modules are
+# only imported when a job needs them, so a client talking to a running
+# daemon never pays for building their tables.
+
+# One daemon per user: it reads and writes any path a client sends, so the
+# socket must never be shared
+def default_socket_path():
+    if "ERROR404_SOCKET" in os.environ:
+        return os.environ["ERROR404_SOCKET"]
+    if os.environ.get("XDG_RUNTIME_DIR"):
+        return os.path.join(os.environ["XDG_RUNTIME_DIR"], "error404.sock")
+    return f"/tmp/error404-{os.getuid()}.sock"
+
+
+DEFAULT_SOCKET = default_socket_path()
+
+OUTPUT_NAMES = {"compile": "lines", "assemble": "words", "object": "lines", "disassemble": "lines"}
+
+# Every frame is a 4-byte big-endian length followed by a UTF-8 JSON body
+FRAME_HEADER = struct.Struct(">I")
+
+
+## FRAMING
+def send_frame(sock, payload):
+    body = json.dumps(payload).encode("utf-8")
+    sock.sendall(FRAME_HEADER.pack(len(body)) + body)
+
+
+def recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 16))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_frame(sock):
+    header = recv_exact(sock, FRAME_HEADER.size)
+    if header is None:
+        return None  # peer closed the connection
+    (size,) = FRAME_HEADER.unpack(header)
+    body = recv_exact(sock, size)
+    if body is None:
+        raise ConnectionError("connection closed mid-frame")
+    return json.loads(body.decode("utf-8"))
+
+
+## JOBS
+# compile is not here: run_file streams it instead of holding the output
+def run_job(op, source):
+    if op == "assemble":
+        from assembler import assemble_program
+        return assemble_program(source.splitlines())
+    if op == "object":
+        from assembler import assemble_object
+        from linker import format_object
+        return format_object(assemble_object(source.splitlines()))
+    if op == "disassemble":
+        from dissasembler import identify_and_inject_labels
+        return identify_and_inject_labels(source.splitlines())
+    raise ValueError(f"Unknown job: {op}")
+
+
+def write_lines(path, lines):
+    with open(path, "w") as f:
+        for line in lines:
+            f.write(line + "\n")
+
+
+# In-process job; the compiler streams its output straight to disk
+def run_file(op, input_path, output_path):
+    if op == "compile":
+        from compiler import compile_file
+        return compile_file(input_path, output_path)
+
+    with open(input_path, "r") as f:
+        output = run_job(op, f.read())
+    write_lines(output_path, output)
+    from instructions import DATA_MARKER
+    if op == "assemble" and DATA_MARKER in output:
+        return len(output) - 1  # the marker line is not a word
+    return len(output)
+
+
+# Daemon job; returns None when no daemon is listening or it went away
+# before replying, so the caller can run the job in-process instead
+def run_remote(op, input_path, output_path, socket_path=DEFAULT_SOCKET):
+    if not os.path.exists(socket_path):
+        return None
+    try:
+        return submit(op, input_path, output_path, socket_path)
+    except OSError:  # gone, refused, or another user's socket
+        return None
+
+
+# The daemon reads and writes the files itself, so source and output never
+# cross the socket and the compiler can stream between them
+def submit(op, input_path, output_path, socket_path=DEFAULT_SOCKET):
+    job = {"op": op, "input": os.path.abspath(input_path), "output": os.path.abspath(output_path)}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        send_frame(sock, job)
+        reply = recv_frame(sock)
+
+    if reply is None:
+        raise ConnectionError("daemon closed the connection without replying")
+    if not reply["ok"]:
+        raise ValueError(reply["error"])
+    return reply["written"]
+
+
+## DAEMON
+def serve(socket_path=DEFAULT_SOCKET):
+    import signal
+    import socketserver
+
+    # Build the instruction tables and compile the regexes once, up front
+    import compiler, assembler, dissasembler  # noqa: F401
+
+    class JobHandler(socketserver.BaseRequestHandler):
+        def handle(self):
+            # a client may send any number of jobs over one connection
+            while True:
+                job = recv_frame(self.request)
+                if job is None:
+                    return
+                try:
+                    reply = {"ok": True, "written": run_file(job["op"], job["input"], job["output"])}
+                except Exception as e:
+                    reply = {"ok": False, "error": str(e)}
+                send_frame(self.request, reply)
+
+    if os.path.exists(socket_path):
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                probe.connect(socket_path)
+        except ConnectionRefusedError:
+            os.unlink(socket_path)  # stale socket left by a dead daemon
+        except OSError as e:
+            raise RuntimeError(f"Cannot use {socket_path}: {e}")
+        else:
+            raise RuntimeError(f"A daemon is already listening on {socket_path}")
+
+    # let `kill` shut down cleanly and remove the socket file
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    # only this user may connect; the umask covers the moment between bind
+    # and chmod
+    old_umask = os.umask(0o177)
+    try:
+        server = socketserver.ThreadingUnixStreamServer(socket_path, JobHandler)
+    finally:
+        os.umask(old_umask)
+    os.chmod(socket_path, 0o600)
+
+    with server:
+        print(f"Listening on {socket_path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(socket_path)
+
+
+### USAGE
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="error404", description="Error-404 toolchain")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="daemon socket path")
+    parser.add_argument("--local", action="store_true", help="never use the daemon")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for op, help_text in [("compile", "C -> Error-404 ASM"),
+                          ("assemble", "Error-404 ASM -> machine code"),
+                          ("disassemble", "machine code -> Error-404 ASM")]:
+        command = commands.add_parser(op, help=help_text)
+        command.add_argument("input")
+        command.add_argument("output")
+        if op == "assemble":
+            command.add_argument("-c", dest="object", action="store_true",
+                                 help="write a relocatable object file")
+    link_command = commands.add_parser("link", help="object files -> machine code")
+    link_command.add_argument("output")
+    link_command.add_argument("objects", nargs="+")
+    commands.add_parser("daemon", help="serve jobs over a Unix socket")
+    args = parser.parse_args(argv)
+
+    if args.command == "daemon":
+        try:
+            serve(args.socket)
+        except RuntimeError as e:
+            print(e)
+            return 1
+        return 0
+
+    if args.command == "link":
+        from linker import link, parse_object
+        try:
+            objects = []
+            for path in args.objects:
+                with open(path, "r") as f:
+                    objects.append(parse_object(f.readlines()))
+            output = link(objects)
+        except ValueError as e:
+            print(f"Link failed: {e}")
+            return 1
+        write_lines(args.output, output)
+        print(f"Linked {len(objects)} objects to {args.output}")
+        return 0
+
+    if args.command == "assemble" and args.object:
+        args.command = "object"
+
+    try:
+        written = None
+        if not args.local:
+            written = run_remote(args.command, args.input, args.output, args.socket)
+        if written is None:
+            written = run_file(args.command, args.input, args.output)
+    except Exception as e:
+        # reported like the daemon reports a failed job
+        print(f"{args.command.capitalize()} failed: {e}")
+        return 1
+
+    print(f"Wrote {written} {OUTPUT_NAMES[args.command]} to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
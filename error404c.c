@@ -0,0 +1,121 @@
+/*
+ * Thin client for `python error404.py daemon`.
+ *
+ * The Python CLI pays for interpreter startup on every call, which is more
+ * than the job itself costs once the daemon is warm. This client only sends
+ * one frame and waits for the reply, so a build system calling it thousands
+ * of times pays for a socket round-trip and nothing else.
+ *
+ *   cc -O2 -o error404c error404c.c
+ *   ./error404c compile in.c out.asm
+ *
+ * op is compile, assemble, object (assemble -c) or disassemble. The socket is
+ * found the same way error404.py finds it. Exit status: 0 on success, 1 if
+ * the job failed, 2 if no daemon answered (run `error404.py --local` instead).
+ */
+#include <stdint.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <sys/socket.h>
+#include <sys/un.h>
+#include <unistd.h>
+
+#define NO_DAEMON 2
+
+/* Appends `path` as an absolute JSON string; 0 if it cannot be sent */
+static int append_path(char *buf, size_t size, const char *path)
+{
+    char cwd[4096] = "";
+    size_t len = strlen(buf);
+
+    if (path[0] != '/' && !getcwd(cwd, sizeof cwd))
+        return 0;
+    for (const char *p = path; *p; p++) {
+        /* keep the JSON trivial: no quoting needed */
+        if (*p == '"' || *p == '\\' || (unsigned char)*p < 0x20)
+            return 0;
+    }
+    return snprintf(buf + len, size - len, "\"%s%s%s\"", cwd, cwd[0] ? "/" : "", path)
+           < (int)(size - len);
+}
+
+static int read_exact(int fd, void *buf, size_t size)
+{
+    char *p = buf;
+    while (size) {
+        ssize_t n = read(fd, p, size);
+        if (n <= 0)
+            return 0;
+        p += n;
+        size -= n;
+    }
+    return 1;
+}
+
+static void socket_path(char *buf, size_t size)
+{
+    const char *env = getenv("ERROR404_SOCKET");
+    const char *runtime = getenv("XDG_RUNTIME_DIR");
+
+    if (env)
+        snprintf(buf, size, "%s", env);
+    else if (runtime && runtime[0])
+        snprintf(buf, size, "%s/error404.sock", runtime);
+    else
+        snprintf(buf, size, "/tmp/error404-%u.sock", (unsigned)getuid());
+}
+
+int main(int argc, char **argv)
+{
+    char body[3 * 4096 + 64];
+    struct sockaddr_un addr = {.sun_family = AF_UNIX};
+    unsigned char header[4];
+    uint32_t size;
+    char *reply;
+    int fd;
+
+    if (argc != 4) {
+        fprintf(stderr, "Usage: error404c compile|assemble|object|disassemble input output\n");
+        return 1;
+    }
+
+    snprintf(body, sizeof body, "{\"op\": \"%s\", \"input\": ", argv[1]);
+    if (!append_path(body, sizeof body, argv[2]))
+        goto bad_path;
+    strcat(body, ", \"output\": ");
+    if (!append_path(body, sizeof body, argv[3]))
+        goto bad_path;
+    strcat(body, "}");
+
+    socket_path(addr.sun_path, sizeof addr.sun_path);
+    fd = socket(AF_UNIX, SOCK_STREAM, 0);
+    if (fd < 0 || connect(fd, (struct sockaddr *)&addr, sizeof addr) < 0)
+        return NO_DAEMON;
+
+    size = strlen(body);
+    header[0] = size >> 24;
+    header[1] = size >> 16;
+    header[2] = size >> 8;
+    header[3] = size;
+    if (write(fd, header, 4) != 4 || write(fd, body, size) != (ssize_t)size)
+        return NO_DAEMON;
+
+    if (!read_exact(fd, header, 4))
+        return NO_DAEMON;
+    size = (uint32_t)header[0] << 24 | header[1] << 16 | header[2] << 8 | header[3];
+    reply = malloc(size + 1);
+    if (!reply || !read_exact(fd, reply, size))
+        return NO_DAEMON;
+    reply[size] = '\0';
+    close(fd);
+
+    if (strstr(reply, "\"ok\": true"))
+        return 0;
+    fprintf(stderr, "%s failed: %s\n", argv[1], reply);
+    return 1;
+
+bad_path:
+    fprintf(stderr, "error404c: cannot send path, use error404.py\n");
+    return 1;
+}
@@ -0,0 +1,108 @@
+from array import array
+import struct
+import sys
+
+# Execution trace recorded by the TRACE instruction. Events live in one
+# preallocated array of int64 slots used as a ring buffer, so recording an
+# event only overwrites existing slots and never allocates.
+
+TRACE_MAGIC = b"E404TRC1"
+# magic, number of traced registers, capacity, total events recorded
+TRACE_HEADER = struct.Struct("<8sHIQ")
+DEFAULT_TRACE_REGISTERS = (1, 2, 3, 4, 5, 6, 7, 8)
+
+
+class TraceBuffer:
+    def __init__(self, capacity=4096, registers=DEFAULT_TRACE_REGISTERS):
+        if capacity < 1:
+            raise ValueError("Trace capacity must be at least 1")
+        self.capacity = capacity
+        self.registers = tuple(registers)
+        self.stride = 2 + len(self.registers)  # pc, cycle, then the registers
+        self.slots = array("q", bytes(8 * self.stride * capacity))
+        self.end = self.stride * capacity
+        self.pos = 0      # slot index of the next event
+        self.count = 0    # events recorded, including overwritten ones
+
+    def record(self, pc, cycle, regs):
+        slots = self.slots
+        i = self.pos
+        slots[i] = pc
+        slots[i + 1] = cycle
+        i += 2
+        for r in self.registers:
+            slots[i] = regs[r]
+            i += 1
+        self.pos = 0 if i == self.end else i
+        self.count += 1
+
+    # oldest event first
+    def ordered_slots(self):
+        if self.count < self.capacity:
+            return self.slots[:self.pos]
+        return self.slots[self.pos:] + self.slots[:self.pos]
+
+    def dump(self, path):
+        slots = self.ordered_slots()
+        if sys.byteorder == "big":
+            slots.byteswap()  # the file is always little-endian
+        with open(path, "wb") as f:
+            f.write(TRACE_HEADER.pack(TRACE_MAGIC, len(self.registers), self.capacity, self.count))
+            f.write(bytes(self.registers))
+            f.write(slots.tobytes())
+
+
+## READER
+# returns (registers, total events recorded, [(pc, cycle, register values)])
+def read_trace(path):
+    with open(path, "rb") as f:
+        header = f.read(TRACE_HEADER.size)
+        if len(header) != TRACE_HEADER.size:
+            raise ValueError(f"Truncated trace file: {path}")
+        magic, nregs, capacity, count = TRACE_HEADER.unpack(header)
+        if magic != TRACE_MAGIC:
+            raise ValueError(f"Not an Error-404 trace file: {path}")
+        registers = tuple(f.read(nregs))
+        slots = array("q")
+        slots.frombytes(f.read())
+
+    if sys.byteorder == "big":
+        slots.byteswap()
+
+    stride = 2 + nregs
+    events = []
+    for i in range(0, len(slots) - len(slots) % stride, stride):
+        events.append((slots[i], slots[i + 1], tuple(slots[i + 2:i + stride])))
+    return registers, count, events
+
+
+def format_trace(trace_path, binary_lines):
+    from dissasembler import REVERSE_REGISTER_MAP, disassemble_binary, split_sections
+
+    registers, count, events = read_trace(trace_path)
+    text_lines, _ = split_sections(binary_lines)
+    listing = disassemble_binary(text_lines)
+    names = [REVERSE_REGISTER_MAP[format(r, "05b")] for r in registers]
+
+    output = [f"# {len(events)} of {count} events"]
+    for pc, cycle, values in events:
+        asm = listing[pc].strip() if 0 <= pc < len(listing) else "???"
+        regs = " ".join(f"{name}={value}" for name, value in zip(names, values))
+        output.append(f"{cycle:>10} {pc:>6}  {asm:<24} {regs}")
+    return output
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python exec_trace.py program.bin run.trace")
+        sys.exit(1)
+
+    with open(sys.argv[1], "r") as f:
+        binary_lines = f.readlines()
+
+    try:
+        for line in format_trace(sys.argv[2], binary_lines):
+            print(line)
+    except ValueError as e:
+        print(f"Reading trace failed: {e}")
+        sys.exit(1)
@@ -24,4 +24,11 @@ INSTRUCTIONS = {
     # J-Type Instructions
     "REBOOT":  {"type": "J", "opcode": "010011"},
     "JUMP":    {"type": "J", "opcode": "000010"},
-}
\ No newline at end of file
+}
+
+# Line in a .bin file separating the instruction words from the data segment
+DATA_MARKER = ".data"
+
+# Addresses that may not fit one signed 16-bit immediate are loaded in two
+# parts: %hi(label) * ADDRESS_PAGE + %lo(label)
+ADDRESS_PAGE = 1 << 14
@@ -0,0 +1,161 @@
+from instructions import ADDRESS_PAGE, DATA_MARKER
+
+# Object files (.o) are text, like .bin files:
+#
+#   .text       one 32-bit instruction word per line
+#   .data       one 32-bit data word per line
+#   .symbols    <name> <text|data> <address> <global|local>
+#   .relocs     <instruction index> <kind> <symbol>
+#
+# Addresses in an object are relative to the start of its own sections.
+
+BRANCHES = ["BEQ", "BNE", "BLT", "404"]
+
+# Relocation kinds
+RELOC_ADDR = "ADDR26"      # absolute text address in a JUMP/REBOOT
+RELOC_IMM = "IMM16"        # absolute address in an ADDI immediate
+RELOC_BRANCH = "BRANCH16"  # branch offset to a label in another module
+RELOC_HI = "HI16"          # %hi(label): address // ADDRESS_PAGE in an ADDI immediate
+RELOC_LO = "LO16"          # %lo(label): address % ADDRESS_PAGE in an ADDI immediate
+
+OBJECT_SECTIONS = [".text", ".data", ".symbols", ".relocs"]
+
+
+## OBJECT FORMAT
+def format_object(obj):
+    lines = [".text"]
+    lines.extend(obj["text"])
+    lines.append(".data")
+    lines.extend(format(word & 0xFFFFFFFF, '032b') for word in obj["data"])
+    lines.append(".symbols")
+    for name, (section, addr) in obj["symbols"].items():
+        scope = "global" if name in obj["exports"] else "local"
+        lines.append(f"{name} {section} {addr} {scope}")
+    lines.append(".relocs")
+    for idx, kind, symbol in obj["relocs"]:
+        lines.append(f"{idx} {kind} {symbol}")
+    return lines
+
+
+def parse_object(lines):
+    obj = {"text": [], "data": [], "symbols": {}, "exports": set(), "relocs": []}
+    section = None
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line in OBJECT_SECTIONS:
+            section = line
+        elif section == ".text":
+            obj["text"].append(line)
+        elif section == ".data":
+            word = int(line, 2)
+            if line[0] == "1":  # handle negative two's complement
+                word -= (1 << 32)
+            obj["data"].append(word)
+        elif section == ".symbols":
+            name, kind, addr, scope = line.split()
+            obj["symbols"][name] = (kind, int(addr))
+            if scope == "global":
+                obj["exports"].add(name)
+        elif section == ".relocs":
+            idx, kind, symbol = line.split()
+            obj["relocs"].append((int(idx), kind, symbol))
+        else:
+            raise ValueError(f"Not an object file line: {line}")
+
+    if section is None:
+        raise ValueError("Not an object file: no .text section")
+    return obj
+
+
+## LINKER
+# Places the objects one after another (the first one starts at address 0
+# and is where execution begins), resolves every relocation against the
+# module's own labels first and then the exported ones, and returns .bin lines.
+def link(objects):
+    text = []
+    data = []
+    bases = []        # (text base, data base) of each object
+    exported = {}     # name -> (section, absolute address)
+
+    for obj in objects:
+        text_base, data_base = len(text), len(data)
+        bases.append((text_base, data_base))
+        text.extend(obj["text"])
+        data.extend(obj["data"])
+        for name in obj["exports"]:
+            if name in exported:
+                raise ValueError(f"Duplicate exported label: {name}")
+            section, addr = obj["symbols"][name]
+            exported[name] = (section, addr + (text_base if section == "text" else data_base))
+
+    for obj, (text_base, data_base) in zip(objects, bases):
+        for idx, kind, symbol in obj["relocs"]:
+            if symbol in obj["symbols"]:
+                section, addr = obj["symbols"][symbol]
+                addr += text_base if section == "text" else data_base
+            elif symbol in exported:
+                section, addr = exported[symbol]
+            else:
+                raise ValueError(f"Undefined label: {symbol}")
+
+            pc = text_base + idx
+            word = text[pc]
+            if kind == RELOC_ADDR:
+                if section != "text":
+                    raise ValueError(f"Jump to {symbol}, which is not a text label")
+                if addr >= (1 << 26):
+                    raise ValueError(f"Address of {symbol} does not fit in a 26-bit jump target: {addr}")
+                text[pc] = word[:6] + format(addr, '026b')
+            elif kind in (RELOC_IMM, RELOC_HI, RELOC_LO):
+                if kind == RELOC_HI:
+                    addr //= ADDRESS_PAGE
+                elif kind == RELOC_LO:
+                    addr %= ADDRESS_PAGE
+                if addr >= (1 << 15):
+                    raise ValueError(f"Address of {symbol} does not fit in a 16-bit immediate: {addr}")
+                text[pc] = word[:16] + format(addr, '016b')
+            elif kind == RELOC_BRANCH:
+                if section != "text":
+                    raise ValueError(f"Branch to {symbol}, which is not a text label")
+                offset = addr - (pc + 1)
+                if not -(1 << 15) <= offset < (1 << 15):
+                    raise ValueError(f"Branch to {symbol} is out of 16-bit range: offset {offset}")
+                text[pc] = word[:16] + format(offset & 0xFFFF, '016b')  # support 2's complement
+            else:
+                raise ValueError(f"Unknown relocation kind: {kind}")
+
+    if data:
+        text.append(DATA_MARKER)
+        text.extend(format(word & 0xFFFFFFFF, '032b') for word in data)
+
+    return text
+
+
+### USAGE
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 3:
+        print("Usage: python linker.py output.bin main.o [other.o ...]")
+        sys.exit(1)
+
+    output_file = sys.argv[1]
+
+    try:
+        objects = []
+        for path in sys.argv[2:]:
+            with open(path, "r") as f:
+                objects.append(parse_object(f.readlines()))
+        binary_output = link(objects)
+    except ValueError as e:
+        print(f"Linking failed: {e}")
+        sys.exit(1)
+
+    with open(output_file, "w") as f:
+        for b in binary_output:
+            f.write(b + "\n")
+
+    print(f"Linked {len(objects)} objects to {output_file}")
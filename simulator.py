@@ -0,0 +1,238 @@
+import random
+import sys
+
+from dissasembler import OPCODE_MAP, FUNCT_MAP, split_sections
+
+NUM_REGISTERS = 15
+
+# Exit statuses
+EXIT_OK = 0        # ran off the end of the program, or FREEZE
+EXIT_CRASH = 1     # CRASH instruction
+EXIT_PANIC = 2     # fault: bad memory access, division by zero, bad jump...
+EXIT_TIMEOUT = 3   # max_steps reached
+
+DEFAULT_MEMORY_WORDS = 1024
+
+
+class MachinePanic(Exception):
+    pass
+
+
+MASK64 = (1 << 64) - 1
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+
+
+def to_signed32(value):
+    return ((value + (1 << 31)) & 0xFFFFFFFF) - (1 << 31)
+
+
+# GLITCH swaps when this is true. It is a SplitMix64 hash of the seed and
+# the cycle, so a run depends only on its seed and the batch simulator can
+# reproduce any single run lane by lane.
+def glitch_roll(seed, cycle):
+    z = (seed + cycle * GOLDEN_GAMMA) & MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+    return (z ^ (z >> 31)) >> 63 == 1
+
+
+## DECODER
+# Every instruction becomes (name, a, b, c):
+#   ADD rd, rs, rt      -> (name, rd, rs, rt)
+#   PANIC/FORK rs       -> (name, rs, 0, 0)
+#   NULL rd             -> (name, rd, 0, 0)
+#   ADDI/LW/SW rt, rs   -> (name, rt, rs, imm)
+#   branches rs, rt     -> (name, rs, rt, offset)
+#   GLITCH rs, rt       -> (name, rs, rt, 0)
+#   JUMP/REBOOT addr    -> (name, addr, 0, 0)
+def decode_word(word):
+    opcode = word[:6]
+    rs = int(word[6:11], 2)
+    rt = int(word[11:16], 2)
+    rd = int(word[16:21], 2)
+    imm = int(word[16:32], 2)
+    if word[16] == "1":  # handle negative two's complement
+        imm -= (1 << 16)
+
+    name = FUNCT_MAP.get((opcode, word[26:32]))
+    if name is not None:
+        if name in ["PANIC", "FORK"]:
+            return (name, rs, 0, 0)
+        if name == "NULL":
+            return (name, rd, 0, 0)
+        return (name, rd, rs, rt)
+
+    name = OPCODE_MAP.get(opcode)
+    if name in ["JUMP", "REBOOT"]:
+        return (name, int(word[6:], 2), 0, 0)
+    if name in ["ADDI", "LW", "SW"]:
+        return (name, rt, rs, imm)
+    if name in ["BEQ", "BNE", "BLT", "404", "GLITCH"]:
+        return (name, rs, rt, imm)
+    raise ValueError(f"Cannot decode instruction word: {word}")
+
+
+def load_program(binary_lines):
+    text_lines, data_lines = split_sections(binary_lines)
+    program = []
+    for pc, word in enumerate(text_lines):
+        if len(word) != 32:
+            raise ValueError(f"Instruction {pc} is not 32 bits: {word}")
+        program.append(decode_word(word))
+
+    data = []
+    for word in data_lines:
+        value = int(word, 2)
+        if word[0] == "1":  # handle negative two's complement
+            value -= (1 << 32)
+        data.append(value)
+
+    return program, data
+
+
+## EXECUTION
+def run(program, data, trace=None, seed=None, max_steps=1_000_000,
+        memory_words=DEFAULT_MEMORY_WORDS, out=None):
+    regs = [0] * NUM_REGISTERS
+    memory = data + [0] * max(memory_words - len(data), 0)
+    seed = random.getrandbits(64) if seed is None else seed & MASK64
+    output = [] if out is None else out
+    end = len(program)
+    pc = 0
+    cycle = 0
+
+    try:
+        while True:
+            # finishing on the last allowed step is not a timeout
+            if pc == end:
+                return EXIT_OK, output, cycle
+            if not 0 <= pc < end:
+                raise MachinePanic(f"jump outside the program to {pc}")
+            if cycle >= max_steps:
+                return EXIT_TIMEOUT, output, cycle
+
+            name, a, b, c = program[pc]
+            cycle += 1
+            pc += 1
+
+            if name == "ADDI":
+                regs[a] = to_signed32(regs[b] + c)
+            elif name == "ADD":
+                regs[a] = to_signed32(regs[b] + regs[c])
+            elif name == "SUB":
+                regs[a] = to_signed32(regs[b] - regs[c])
+            elif name == "MUL":
+                regs[a] = to_signed32(regs[b] * regs[c])
+            elif name in ("DIV", "MOD"):
+                if regs[c] == 0:
+                    raise MachinePanic(f"division by zero at {pc - 1}")
+                # C semantics: the quotient truncates toward zero
+                quotient = abs(regs[b]) // abs(regs[c])
+                if (regs[b] < 0) != (regs[c] < 0):
+                    quotient = -quotient
+                regs[a] = to_signed32(quotient if name == "DIV" else regs[b] - quotient * regs[c])
+            elif name == "BEQ":
+                if regs[a] == regs[b]:
+                    pc += c
+            elif name == "BNE":
+                if regs[a] != regs[b]:
+                    pc += c
+            elif name == "BLT":
+                if regs[a] < regs[b]:
+                    pc += c
+            elif name == "404":
+                if regs[b] == -1:
+                    pc += c
+            elif name == "JUMP":
+                pc = a
+            elif name == "LW" or name == "SW":
+                addr = regs[b] + c
+                if not 0 <= addr < len(memory):
+                    raise MachinePanic(f"{name} outside memory at address {addr}")
+                if name == "LW":
+                    regs[a] = memory[addr]
+                else:
+                    memory[addr] = regs[a]
+            elif name == "PANIC":
+                output.append(chr(regs[a] & 0xFF))
+            elif name == "TRACE":
+                if trace is not None:
+                    trace.record(pc - 1, cycle, regs)
+            elif name == "NULL":
+                regs[a] = 0
+            elif name == "GLITCH":
+                if glitch_roll(seed, cycle):
+                    regs[a], regs[b] = regs[b], regs[a]
+            elif name == "REBOOT":
+                regs = [0] * NUM_REGISTERS
+                pc = a
+            elif name == "CRASH":
+                return EXIT_CRASH, output, cycle
+            elif name == "FREEZE":
+                return EXIT_OK, output, cycle
+            # FORK and BREAKPT do nothing in the simulator
+
+            regs[0] = 0  # $r0 always reads as zero
+    except MachinePanic as e:
+        output.append(f"\n[panic] {e}\n")
+        return EXIT_PANIC, output, cycle
+
+
+### USAGE
+# "1,2,9" -> (1, 2, 9)
+def parse_register_list(text):
+    import argparse
+
+    try:
+        registers = tuple(int(r) for r in text.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a comma-separated list of register numbers: {text}")
+    for r in registers:
+        if not 0 <= r < NUM_REGISTERS:
+            raise argparse.ArgumentTypeError(f"no register $r{r}")
+    return registers
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run an Error-404 .bin program")
+    parser.add_argument("program")
+    parser.add_argument("--seed", type=int, default=None, help="seed for GLITCH")
+    parser.add_argument("--max-steps", type=int, default=1_000_000)
+    parser.add_argument("--trace", metavar="PATH", help="write the TRACE ring buffer here on exit")
+    parser.add_argument("--trace-size", type=int, default=4096, help="events kept in the ring buffer")
+    parser.add_argument("--trace-regs", type=parse_register_list, default=None, metavar="LIST",
+                        help="registers to record, e.g. 1,2,9 (default $r1-$r8)")
+    args = parser.parse_args(argv)
+
+    with open(args.program, "r") as f:
+        binary_lines = f.readlines()
+
+    try:
+        program, data = load_program(binary_lines)
+    except ValueError as e:
+        print(f"Loading failed: {e}")
+        return EXIT_PANIC
+
+    trace = None
+    if args.trace:
+        from exec_trace import DEFAULT_TRACE_REGISTERS, TraceBuffer
+        trace = TraceBuffer(args.trace_size, args.trace_regs or DEFAULT_TRACE_REGISTERS)
+
+    output = []
+    status = EXIT_PANIC
+    try:
+        status, output, _ = run(program, data, trace=trace, seed=args.seed,
+                                max_steps=args.max_steps, out=output)
+    finally:
+        # written even if the run is interrupted, for post-mortem debugging
+        sys.stdout.write("".join(output))
+        if trace is not None:
+            trace.dump(args.trace)
+
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())